@@ -44,7 +44,7 @@ async def root():
 @app.post("/logs/raw")
 async def raw_logs(request: RawLogsRequest):
     print(f"[RAW LOGS] Received raw logs: {request.data}")
-    mongo_client.insert_log(request.data, USER_ID)
+    await mongo_client.insert_log_async(request.data, USER_ID)
     return {"message": "Logs received"}
 
 # Session started endpoint - generates and sends session info, returns OK
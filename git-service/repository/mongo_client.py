@@ -1,4 +1,4 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
 from pymongo.operations import SearchIndexModel
 import os
 import openai
@@ -38,6 +38,10 @@ class MongoClientService:
         self.logs_collection = self.db.get_collection("logs")
         self.commits_collection = self.db.get_collection("gitstore")
         
+        # Async MongoDB client for writes issued from the event loop
+        self.async_client = AsyncMongoClient(self.mongo_uri)
+        self.async_logs_collection = self.async_client.get_database(self.db.name).get_collection("logs")
+        
         # Ensure vector search index exists for commits
         self._ensure_vector_index()
     
@@ -108,6 +112,31 @@ class MongoClientService:
             logger.error(f"Error inserting log: {e}")
             raise
     
+    async def insert_log_async(self, data: Dict[str, Any], user_id: str) -> str:
+        """
+        Insert a log entry without blocking the event loop.
+        
+        Args:
+            data: Log payload
+            user_id: User ID
+            
+        Returns:
+            Inserted document ID as string
+        """
+        try:
+            log_entry = {
+                "timestamp": datetime.utcnow(),
+                "user_id": user_id,
+                **data
+            }
+            
+            result = await self.async_logs_collection.insert_one(log_entry)
+            logger.info(f"Log inserted with ID: {result.inserted_id}")
+            return str(result.inserted_id)
+        except Exception as e:
+            logger.error(f"Error inserting log: {e}")
+            raise
+    
     def get_logs(self, 
                  level: Optional[str] = None, 
                  limit: int = 100, 
@@ -327,6 +356,11 @@ class MongoClientService:
         """Close the MongoDB connection."""
         self.client.close()
         logger.info("MongoDB connection closed")
+    
+    async def close_async(self):
+        """Close both MongoDB connections from the event loop."""
+        self.close()
+        await self.async_client.close()
 
 # Singleton instance
 _mongo_client = None
@@ -2,9 +2,13 @@
 
 import asyncio
 import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Dict, Any, Optional
 
 import aiohttp
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +29,66 @@ class APIClient:
             'requests_sent': 0,
             'requests_failed': 0
         }
+        self._refresh_cached_config()
+    
+    def _refresh_cached_config(self):
+        """Cache request settings so they are not rebuilt on every request."""
+        self._headers = {
+            'Content-Type': 'application/json',
+            'User-Agent': 'dev-companion/1.0'
+        }
+        
+        token = self.config.get('api', 'token')
+        if token:
+            self._headers['Authorization'] = f'Bearer {token}'
+        
+        self._retry_count = self.config.get('api', 'retry_count')
+        self._retry_delay = self.config.get('api', 'retry_delay')
+        self._max_retry_delay = self.config.get('api', 'max_retry_delay')
+        self._timeout = aiohttp.ClientTimeout(total=self.config.get('api', 'timeout'))
+        self._start_url = self.config.get('api', 'base_url') + self.config.get('api', 'start_path')
+        self._end_url = self.config.get('api', 'base_url') + self.config.get('api', 'end_path')
+    
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Create an HTTP session with a keep-alive connection pool."""
+        connector = aiohttp.TCPConnector(limit=10, keepalive_timeout=60)
+        return aiohttp.ClientSession(connector=connector)
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given attempt."""
+        delay = min(self._max_retry_delay, self._retry_delay * (2 ** attempt))
+        return random.uniform(0, delay)
+    
+    def _retry_after_delay(self, retry_after: Optional[str], attempt: int) -> float:
+        """
+        Get the delay requested by a Retry-After header.
+        
+        Args:
+            retry_after: Header value (seconds or HTTP-date)
+            attempt: Current attempt number, used for the backoff fallback
+            
+        Returns:
+            Delay in seconds, capped at max_retry_delay
+        """
+        if not retry_after:
+            return self._backoff_delay(attempt)
+        
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+            except (TypeError, ValueError):
+                return self._backoff_delay(attempt)
+            if retry_at.tzinfo is None:
+                retry_at = retry_at.replace(tzinfo=timezone.utc)
+            delay = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        
+        return min(max(delay, 0), self._max_retry_delay)
     
     async def __aenter__(self):
         """Async context manager entry."""
-        self.session = aiohttp.ClientSession()
+        self.session = self._create_session()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -39,7 +99,7 @@ class APIClient:
     async def ensure_session(self):
         """Ensure HTTP session is created."""
         if not self.session:
-            self.session = aiohttp.ClientSession()
+            self.session = self._create_session()
     
     async def close(self):
         """Close the HTTP session."""
@@ -57,8 +117,7 @@ class APIClient:
         Returns:
             Response data including server session_id
         """
-        url = self.config.get('api', 'base_url') + self.config.get('api', 'start_path')
-        return await self._send_request('POST', url, data)
+        return await self._send_request('POST', self._start_url, data)
     
     async def send_session_end(self, data: Dict[str, Any]):
         """
@@ -67,8 +126,7 @@ class APIClient:
         Args:
             data: Session end data
         """
-        url = self.config.get('api', 'base_url') + self.config.get('api', 'end_path')
-        await self._send_request('POST', url, data)
+        await self._send_request('POST', self._end_url, data)
     
     async def _send_request(self, method: str, url: str, data: Dict[str, Any]):
         """
@@ -81,49 +139,49 @@ class APIClient:
         """
         await self.ensure_session()
         
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'dev-companion/1.0'
-        }
-        
-        token = self.config.get('api', 'token')
-        if token:
-            headers['Authorization'] = f'Bearer {token}'
-        
-        retry_count = self.config.get('api', 'retry_count')
-        retry_delay = self.config.get('api', 'retry_delay')
-        timeout = aiohttp.ClientTimeout(total=self.config.get('api', 'timeout'))
+        retry_count = self._retry_count
+        payload = orjson.dumps(data)
         
         for attempt in range(retry_count + 1):
             try:
                 async with self.session.request(
                     method, url, 
-                    json=data, 
-                    headers=headers,
-                    timeout=timeout
+                    data=payload,
+                    headers=self._headers,
+                    timeout=self._timeout
                 ) as response:
+                    body = await response.read()
+                    
                     if response.status < 300:
                         logger.debug(f"API request successful: {url}")
                         self.metrics['requests_sent'] += 1
                         # Return JSON response if available
+                        if not body:
+                            return None
                         try:
-                            return await response.json()
-                        except:
+                            return orjson.loads(body)
+                        except orjson.JSONDecodeError:
                             return None
                     
                     # Retry on server errors or rate limiting
                     if response.status >= 500 or response.status == 429:
                         if attempt < retry_count:
-                            await asyncio.sleep(retry_delay * (attempt + 1))
+                            if response.status in (429, 503):
+                                delay = self._retry_after_delay(
+                                    response.headers.get('Retry-After'), attempt
+                                )
+                            else:
+                                delay = self._backoff_delay(attempt)
+                            await asyncio.sleep(delay)
                             continue
                     
-                    text = await response.text()
+                    text = body.decode('utf-8', errors='replace')
                     raise Exception(f"API error {response.status}: {text}")
                     
             except asyncio.TimeoutError:
                 logger.warning(f"API request timeout (attempt {attempt + 1}/{retry_count + 1})")
                 if attempt < retry_count:
-                    await asyncio.sleep(retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
                     continue
                 self.metrics['requests_failed'] += 1
                 raise
@@ -131,7 +189,7 @@ class APIClient:
             except Exception as e:
                 if attempt < retry_count:
                     logger.debug(f"API request failed (attempt {attempt + 1}): {e}")
-                    await asyncio.sleep(retry_delay * (attempt + 1))
+                    await asyncio.sleep(self._backoff_delay(attempt))
                     continue
                 logger.error(f"API request failed: {e}")
                 self.metrics['requests_failed'] += 1
@@ -1,18 +1,44 @@
 """Claude session file parser."""
 
-import json
+import functools
 import os
 import re
+import time
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Iterator
+from typing import Dict, Any, List, Optional, Iterator, Set, Tuple
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
+import orjson
+from watchfiles import watch, Change
+
 logger = logging.getLogger(__name__)
 
+# Claude replaces non-alphanumeric characters with hyphens
+_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9]')
+
+
+@functools.lru_cache(maxsize=64)
+def _sanitize_project_path(original_path: str) -> str:
+    """Resolve a project path and sanitize it the way Claude does."""
+    return _SANITIZE_RE.sub('-', str(Path(original_path).resolve()))
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_iso_timestamp(timestamp_str: str) -> datetime:
+    """Parse an ISO 8601 timestamp, fast-pathing Claude's 'YYYY-MM-DDTHH:MM:SS.sssZ' form."""
+    s = timestamp_str
+    if len(s) == 24 and s[23] == 'Z' and s[19] == '.':
+        return datetime(
+            int(s[0:4]), int(s[5:7]), int(s[8:10]),
+            int(s[11:13]), int(s[14:16]), int(s[17:19]),
+            int(s[20:23]) * 1000, tzinfo=timezone.utc
+        )
+    return datetime.fromisoformat(s.replace('Z', '+00:00'))
+
 
-@dataclass
+@dataclass(slots=True)
 class ClaudeMessage:
     """Represents a message in Claude session."""
     role: str
@@ -24,24 +50,61 @@ class ClaudeMessage:
     parent_uuid: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ClaudeSession:
     """Represents a Claude session."""
     session_id: str
     cwd: str
     git_branch: str
-    messages: List[ClaudeMessage] = field(default_factory=list)
+    messages: List[ClaudeMessage] = field(default_factory=list)  # Only filled with keep_all_messages
+    message_count: int = 0
+    first_message: Optional[ClaudeMessage] = None
+    last_message: Optional[ClaudeMessage] = None
+    first_user_message: Optional[ClaudeMessage] = None
+    last_assistant_message: Optional[ClaudeMessage] = None
     tool_calls: Dict[str, int] = field(default_factory=dict)
     files_modified: List[str] = field(default_factory=list)
+    _files_modified_set: Set[str] = field(default_factory=set, repr=False, compare=False)
     files_created: List[str] = field(default_factory=list)
     files_read: List[str] = field(default_factory=list)
     commands_executed: List[str] = field(default_factory=list)
+    _commands_executed_set: Set[str] = field(default_factory=set, repr=False, compare=False)
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
     user_prompt: str = ""
     final_output: str = ""
 
 
+def _handle_read(session: ClaudeSession, input_data: Dict[str, Any]):
+    """Record a file read (Read/Glob tool)."""
+    file_path = input_data.get('file_path') or input_data.get('pattern', '')
+    if file_path:
+        session.files_read.append(file_path)
+
+
+def _handle_write(session: ClaudeSession, input_data: Dict[str, Any]):
+    """Record a file creation (Write tool)."""
+    file_path = input_data.get('file_path', '')
+    if file_path:
+        session.files_created.append(file_path)
+
+
+def _handle_edit(session: ClaudeSession, input_data: Dict[str, Any]):
+    """Record a file modification (Edit/MultiEdit tool)."""
+    file_path = input_data.get('file_path', '')
+    if file_path:
+        session.files_modified.append(file_path)
+        session._files_modified_set.add(file_path)
+
+
+def _handle_bash(session: ClaudeSession, input_data: Dict[str, Any]):
+    """Record a command execution (Bash tool)."""
+    command = input_data.get('command', '')
+    if command:
+        session.commands_executed.append(command)
+        session._commands_executed_set.add(command)
+
+
 class ClaudeSessionParser:
     """Parser for Claude session JSONL files."""
     
@@ -58,6 +121,19 @@ class ClaudeSessionParser:
         'TodoWrite': 'todo_manage'
     }
     
+    # Handlers extracting file operations and commands from tool inputs
+    TOOL_HANDLERS = {
+        'Read': _handle_read,
+        'Glob': _handle_read,
+        'Write': _handle_write,
+        'Edit': _handle_edit,
+        'MultiEdit': _handle_edit,
+        'Bash': _handle_bash
+    }
+    
+    # Read size for streaming session files
+    READ_CHUNK_SIZE = 1 << 20
+    
     def __init__(self, claude_home: str = None):
         """
         Initialize parser.
@@ -67,6 +143,9 @@ class ClaudeSessionParser:
         """
         self.claude_home = Path(claude_home or os.path.expanduser("~/.claude"))
         self.projects_dir = self.claude_home / "projects"
+        
+        # Per-file (byte offset, session) state for incremental parsing
+        self._tail_state: Dict[Path, Tuple[int, ClaudeSession]] = {}
     
     def get_project_path(self, original_path: str) -> Path:
         """
@@ -78,9 +157,7 @@ class ClaudeSessionParser:
         Returns:
             Path to Claude project directory
         """
-        # Claude replaces non-alphanumeric characters with hyphens
-        sanitized = re.sub(r'[^a-zA-Z0-9]', '-', str(Path(original_path).resolve()))
-        return self.projects_dir / sanitized
+        return self.projects_dir / _sanitize_project_path(str(original_path))
     
     def find_session_files(self, project_path: str) -> List[Path]:
         """
@@ -92,6 +169,18 @@ class ClaudeSessionParser:
         Returns:
             List of session file paths
         """
+        return [path for path, _ in self.find_session_entries(project_path)]
+    
+    def find_session_entries(self, project_path: str) -> List[Tuple[Path, float]]:
+        """
+        Find all session files for a project along with their modification times.
+        
+        Args:
+            project_path: Original project path
+            
+        Returns:
+            List of (session file path, mtime) tuples, newest first
+        """
         project_dir = self.get_project_path(project_path)
         
         # Looking for Claude sessions
@@ -103,110 +192,202 @@ class ClaudeSessionParser:
                 existing = list(self.projects_dir.iterdir())
             return []
         
-        # Find all JSONL files (session files)
-        session_files = list(project_dir.glob("*.jsonl"))
-        return sorted(session_files, key=lambda p: p.stat().st_mtime, reverse=True)
+        # Find all JSONL files (session files) in a single directory pass
+        with os.scandir(project_dir) as it:
+            entries = [
+                (Path(entry.path), entry.stat().st_mtime)
+                for entry in it
+                if entry.name.endswith('.jsonl') and entry.is_file()
+            ]
+        
+        entries.sort(key=lambda e: e[1], reverse=True)
+        return entries
     
-    def parse_session_file(self, file_path: Path) -> Optional[ClaudeSession]:
+    def parse_session_file(self, file_path: Path, keep_all_messages: bool = False) -> Optional[ClaudeSession]:
         """
         Parse a Claude session JSONL file.
         
         Args:
             file_path: Path to session file
+            keep_all_messages: Also keep every parsed message in session.messages
             
         Returns:
             Parsed session or None if error
         """
         try:
-            session_id = file_path.stem
-            session = ClaudeSession(
-                session_id=session_id,
-                cwd="",  # Will be set from JSONL
-                git_branch=""  # Will be set from JSONL
-            )
+            session = self._new_session(file_path)
             
-            with open(file_path, 'r') as f:
-                for line_num, line in enumerate(f, 1):
-                    if not line.strip():
-                        continue
+            with open(file_path, 'rb') as f:
+                leftover = b''
+                while True:
+                    chunk = f.read(self.READ_CHUNK_SIZE)
+                    if not chunk:
+                        break
                     
-                    try:
-                        data = json.loads(line)
-                        self._process_entry(session, data)
-                    except json.JSONDecodeError as e:
-                        pass  # Skip malformed JSON lines
-                        continue
-            
-            # Set session times
-            if session.messages:
-                session.start_time = self._parse_timestamp(session.messages[0].timestamp)
-                session.end_time = self._parse_timestamp(session.messages[-1].timestamp)
+                    lines = (leftover + chunk).split(b'\n')
+                    leftover = lines.pop()  # Possibly incomplete last line
+                    for line in lines:
+                        self._process_line(session, line, keep_all_messages)
                 
-                # Extract first user prompt
-                for msg in session.messages:
-                    if msg.role == "user" and msg.content:
-                        session.user_prompt = msg.content[:200]  # First 200 chars
-                        break
+                if leftover:
+                    self._process_line(session, leftover, keep_all_messages)
+            
+            self._finalize_session(session)
+            return session
+            
+        except Exception as e:
+            logger.error(f"Error parsing session file {file_path}: {e}")
+            return None
+    
+    def update_session_file(self, file_path: Path, keep_all_messages: bool = False) -> Optional[ClaudeSession]:
+        """
+        Incrementally parse a Claude session JSONL file.
+        
+        Only bytes appended since the previous call are parsed and applied to
+        the cached session. A trailing partial line is left for the next call.
+        
+        Args:
+            file_path: Path to session file
+            keep_all_messages: Also keep every parsed message in session.messages
+            
+        Returns:
+            Updated session or None if error
+        """
+        try:
+            offset, session = self._tail_state.get(file_path, (0, None))
+            
+            with open(file_path, 'rb') as f:
+                # Start over if the file is new to us or was truncated
+                if session is None or os.fstat(f.fileno()).st_size < offset:
+                    offset, session = 0, self._new_session(file_path)
                 
-                # Extract last assistant message as final output
-                for msg in reversed(session.messages):
-                    if msg.role == "assistant" and msg.content:
-                        session.final_output = msg.content[:200]
-                        break
+                f.seek(offset)
+                tail = f.read()
+            
+            end = tail.rfind(b'\n')
+            if end != -1:
+                for line in tail[:end].split(b'\n'):
+                    self._process_line(session, line, keep_all_messages)
+                offset += end + 1
             
+            self._tail_state[file_path] = (offset, session)
+            self._finalize_session(session)
             return session
             
         except Exception as e:
             logger.error(f"Error parsing session file {file_path}: {e}")
             return None
     
-    def _process_entry(self, session: ClaudeSession, data: Dict[str, Any]):
+    def forget_session_file(self, file_path: Path):
+        """
+        Drop the incremental parse state kept for a session file.
+        
+        Args:
+            file_path: Path to session file
+        """
+        self._tail_state.pop(file_path, None)
+    
+    def _new_session(self, file_path: Path) -> ClaudeSession:
+        """Create an empty session for a session file."""
+        return ClaudeSession(
+            session_id=file_path.stem,
+            cwd="",  # Will be set from JSONL
+            git_branch=""  # Will be set from JSONL
+        )
+    
+    def _finalize_session(self, session: ClaudeSession):
+        """Set session times, prompt and output from the tracked messages."""
+        if session.first_message:
+            session.start_time = self._parse_timestamp(session.first_message.timestamp)
+            session.end_time = self._parse_timestamp(session.last_message.timestamp)
+        
+        # First user prompt and last assistant message as final output
+        if session.first_user_message:
+            session.user_prompt = session.first_user_message.content[:200]  # First 200 chars
+        if session.last_assistant_message:
+            session.final_output = session.last_assistant_message.content[:200]
+    
+    def _process_line(self, session: ClaudeSession, line: bytes, keep_all_messages: bool = False):
+        """Parse and process a single raw JSONL line."""
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return  # Skip empty or malformed JSON lines
+        self._process_entry(session, data, keep_all_messages)
+    
+    def _process_entry(self, session: ClaudeSession, data: Dict[str, Any], keep_all_messages: bool = False):
         """Process a single JSONL entry."""
-        # Extract basic info
-        entry_type = data.get('type', '')
+        get = data.get
         
         # Set project info from first entry
-        if not session.cwd and 'cwd' in data:
-            session.cwd = data['cwd']
-        if not session.git_branch and 'gitBranch' in data:
-            session.git_branch = data['gitBranch']
-        
-        # Process messages
-        if 'message' in data:
-            msg_data = data['message']
-            
-            # Handle different message formats
-            if isinstance(msg_data, dict):
-                msg = self._parse_message(msg_data, data)
-                if msg:
+        if not session.cwd:
+            cwd = get('cwd')
+            if cwd:
+                session.cwd = cwd
+        if not session.git_branch:
+            git_branch = get('gitBranch')
+            if git_branch:
+                session.git_branch = git_branch
+        
+        # Process messages (handle different message formats)
+        msg_data = get('message')
+        if isinstance(msg_data, dict):
+            msg = self._parse_message(msg_data, data)
+            if msg:
+                self._track_message(session, msg)
+                if keep_all_messages:
                     session.messages.append(msg)
-                    
-                    # Process tool uses
-                    for tool_use in msg.tool_uses:
-                        self._process_tool_use(session, tool_use)
+                
+                # Process tool uses
+                for tool_use in msg.tool_uses:
+                    self._process_tool_use(session, tool_use)
         
         # Process tool results
-        if 'toolUseResult' in data:
-            self._process_tool_result(session, data['toolUseResult'])
+        tool_result = get('toolUseResult')
+        if tool_result is not None:
+            self._process_tool_result(session, tool_result)
+    
+    def _track_message(self, session: ClaudeSession, msg: ClaudeMessage):
+        """Update the head/tail message slots used to summarize a session."""
+        session.message_count += 1
+        if session.first_message is None:
+            session.first_message = msg
+        session.last_message = msg
+        
+        if msg.content:
+            if msg.role == "user":
+                if session.first_user_message is None:
+                    session.first_user_message = msg
+            elif msg.role == "assistant":
+                session.last_assistant_message = msg
     
     def _parse_message(self, msg_data: Dict[str, Any], entry_data: Dict[str, Any]) -> Optional[ClaudeMessage]:
         """Parse a message from entry data."""
-        role = msg_data.get('role', entry_data.get('userType', ''))
+        entry_get = entry_data.get
+        
+        role = msg_data.get('role')
+        if role is None:
+            role = entry_get('userType', '')
         
         # Extract content
         content = ""
         tool_uses = []
         
-        if 'content' in msg_data:
-            if isinstance(msg_data['content'], str):
-                content = msg_data['content']
-            elif isinstance(msg_data['content'], list):
-                for item in msg_data['content']:
-                    if isinstance(item, dict):
-                        if item.get('type') == 'text':
-                            content += item.get('text', '')
-                        elif item.get('type') == 'tool_use':
-                            tool_uses.append(item)
+        content_items = msg_data.get('content')
+        if isinstance(content_items, str):
+            content = content_items
+        elif isinstance(content_items, list):
+            text_parts = []
+            append_text = text_parts.append
+            append_tool_use = tool_uses.append
+            for item in content_items:
+                if isinstance(item, dict):
+                    item_type = item.get('type')
+                    if item_type == 'text':
+                        append_text(item.get('text', ''))
+                    elif item_type == 'tool_use':
+                        append_tool_use(item)
+            content = ''.join(text_parts)
         
         if not role:
             return None
@@ -214,11 +395,11 @@ class ClaudeSessionParser:
         return ClaudeMessage(
             role=role,
             content=content,
-            timestamp=entry_data.get('timestamp', ''),
-            message_type=entry_data.get('type', ''),
+            timestamp=entry_get('timestamp', ''),
+            message_type=entry_get('type', ''),
             tool_uses=tool_uses,
-            uuid=entry_data.get('uuid', ''),
-            parent_uuid=entry_data.get('parentUuid')
+            uuid=entry_get('uuid', ''),
+            parent_uuid=entry_get('parentUuid')
         )
     
     def _process_tool_use(self, session: ClaudeSession, tool_use: Dict[str, Any]):
@@ -230,28 +411,9 @@ class ClaudeSessionParser:
         session.tool_calls[mapped_name] = session.tool_calls.get(mapped_name, 0) + 1
         
         # Extract file operations and commands
-        if 'input' in tool_use:
-            input_data = tool_use['input']
-            
-            # File operations
-            if tool_name in ['Read', 'Glob']:
-                file_path = input_data.get('file_path') or input_data.get('pattern', '')
-                if file_path:
-                    session.files_read.append(file_path)
-            
-            elif tool_name in ['Write', 'Edit', 'MultiEdit']:
-                file_path = input_data.get('file_path', '')
-                if file_path:
-                    if tool_name == 'Write':
-                        session.files_created.append(file_path)
-                    else:
-                        session.files_modified.append(file_path)
-            
-            # Command execution
-            elif tool_name == 'Bash':
-                command = input_data.get('command', '')
-                if command:
-                    session.commands_executed.append(command)
+        handler = self.TOOL_HANDLERS.get(tool_name)
+        if handler is not None and 'input' in tool_use:
+            handler(session, tool_use['input'])
     
     def _process_tool_result(self, session: ClaudeSession, result: Any):
         """Process a tool result."""
@@ -260,14 +422,15 @@ class ClaudeSessionParser:
             if 'filePath' in result:
                 file_path = result['filePath']
                 if 'oldString' in result:  # Edit operation
-                    if file_path not in session.files_modified:
+                    if file_path not in session._files_modified_set:
+                        session._files_modified_set.add(file_path)
                         session.files_modified.append(file_path)
     
     def _parse_timestamp(self, timestamp_str: str) -> Optional[datetime]:
         """Parse ISO format timestamp."""
         try:
-            return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        except:
+            return _parse_iso_timestamp(timestamp_str)
+        except (TypeError, ValueError):
             return None
     
     def get_active_session(self, project_path: str) -> Optional[ClaudeSession]:
@@ -280,17 +443,27 @@ class ClaudeSessionParser:
         Returns:
             Active session or None
         """
-        session_files = self.find_session_files(project_path)
+        project_dir = self.get_project_path(project_path)
         
-        if not session_files:
+        # Track the most recently modified file in one pass, without sorting
+        latest_file = None
+        latest_mtime = -1.0
+        try:
+            with os.scandir(project_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.jsonl') and entry.is_file():
+                        mtime = entry.stat().st_mtime
+                        if mtime > latest_mtime:
+                            latest_mtime, latest_file = mtime, Path(entry.path)
+        except FileNotFoundError:
+            logger.warning(f"Project directory not found: {project_dir}")
             return None
         
-        # Check the most recent file
-        latest_file = session_files[0]
+        if latest_file is None:
+            return None
         
         # Check if file was modified recently (within last minute)
-        import time
-        file_age = time.time() - latest_file.stat().st_mtime
+        file_age = time.time() - latest_mtime
         
         if file_age < 60:  # Active if modified within last minute
             return self.parse_session_file(latest_file)
@@ -301,6 +474,9 @@ class ClaudeSessionParser:
         """
         Watch for changes in session files.
         
+        Uses filesystem events when the project directory exists and falls
+        back to polling otherwise.
+        
         Args:
             project_path: Original project path
             
@@ -308,26 +484,69 @@ class ClaudeSessionParser:
             Updated sessions
         """
         project_dir = self.get_project_path(project_path)
+        
+        if project_dir.exists():
+            yield from self._watch_session_events(project_dir)
+        else:
+            yield from self._watch_session_polling(project_dir)
+    
+    def _watch_session_events(self, project_dir: Path) -> Iterator[ClaudeSession]:
+        """Watch a project directory using watchfiles events."""
+        # Report the sessions already on disk first, like the polling loop does
+        for session_file in project_dir.glob('*.jsonl'):
+            session = self.update_session_file(session_file)
+            if session:
+                yield session
+        
+        while True:
+            try:
+                # Block until events arrive; bursts of writes are coalesced
+                for changes in watch(project_dir, debounce=100):
+                    changed = set()
+                    for change, path in changes:
+                        session_file = Path(path)
+                        if session_file.suffix != '.jsonl':
+                            continue
+                        if change == Change.deleted:
+                            self.forget_session_file(session_file)
+                            changed.discard(session_file)
+                        else:
+                            changed.add(session_file)
+                    
+                    for session_file in changed:
+                        session = self.update_session_file(session_file)
+                        if session:
+                            yield session
+            
+            except Exception as e:
+                logger.error(f"Error watching sessions: {e}")
+                time.sleep(5)
+    
+    def _watch_session_polling(self, project_dir: Path) -> Iterator[ClaudeSession]:
+        """Watch a project directory by polling file modification times."""
         last_mtime = {}
         
         while True:
             try:
                 if project_dir.exists():
-                    for session_file in project_dir.glob("*.jsonl"):
-                        current_mtime = session_file.stat().st_mtime
-                        
+                    with os.scandir(project_dir) as it:
+                        entries = [
+                            (entry.stat().st_mtime_ns, Path(entry.path))
+                            for entry in it
+                            if entry.name.endswith('.jsonl') and entry.is_file()
+                        ]
+                    
+                    for current_mtime, session_file in entries:
                         if session_file not in last_mtime or last_mtime[session_file] < current_mtime:
                             last_mtime[session_file] = current_mtime
                             
-                            session = self.parse_session_file(session_file)
+                            session = self.update_session_file(session_file)
                             if session:
                                 yield session
                 
                 # Small delay to avoid excessive CPU usage
-                import time
                 time.sleep(1)
                 
             except Exception as e:
                 logger.error(f"Error watching sessions: {e}")
-                import time
-                time.sleep(5)
\ No newline at end of file
+                time.sleep(5)
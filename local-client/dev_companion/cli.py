@@ -3,7 +3,6 @@
 
 import asyncio
 import sys
-import signal
 import logging
 import argparse
 from pathlib import Path
@@ -93,18 +92,9 @@ def main():
     setup_logging(config.log_level)
     logger = logging.getLogger(__name__)
     
-    # Create client
+    # Create client (SIGINT/SIGTERM are handled on its event loop)
     client = DevCompanionClient(config)
     
-    # Setup signal handlers
-    def signal_handler(sig, frame):
-        pass  # Shutting down
-        asyncio.create_task(client.stop())
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
     # Run the client
     # Starting Dev Companion
     
@@ -38,6 +38,43 @@ class Config:
         
         # Cache directory
         self.cache_dir = os.getenv('DEV_COMPANION_CACHE_DIR', '/tmp/dev-companion')
+        
+        # Path-based lookup table used by get()
+        self._values = {
+            ('api', 'base_url'): self.api_base_url,
+            ('api', 'token'): self.api_token,
+            ('api', 'timeout'): self.api_timeout,
+            ('api', 'start_path'): '/session/start',
+            ('api', 'end_path'): '/session/end',
+            ('api', 'retry_count'): 3,
+            ('api', 'retry_delay'): 1,
+            ('api', 'max_retry_delay'): 30,
+            
+            ('websocket', 'url'): self.ws_url,
+            ('websocket', 'reconnect_interval'): 5,
+            ('websocket', 'max_reconnect_delay'): 300,
+            ('websocket', 'ping_interval'): 30,
+            
+            ('session', 'monitor_interval'): self.monitor_interval,
+            ('session', 'claude_home'): self.claude_home,
+            ('session', 'monitored_projects'): self.monitored_projects,
+            ('session', 'cache_dir'): self.cache_dir,
+            ('session', 'enable_cache'): True,
+            
+            ('executor', 'default_timeout'): self.command_timeout,
+            ('executor', 'max_timeout'): 600,
+            ('executor', 'max_output_size'): self.max_output_size,
+            ('executor', 'blocked_commands'): (
+                'rm', 'del', 'format', 'fdisk', 'dd', 'mkfs',
+                'shutdown', 'reboot', 'init', 'systemctl',
+                'passwd', 'useradd', 'userdel', 'usermod',
+                'chown', 'chmod', 'chgrp'
+            ),
+            ('executor', 'allowed_commands'): (),
+            ('executor', 'work_dir'): '',
+            
+            ('logging', 'level'): self.log_level,
+        }
     
     def get(self, *path):
         """
@@ -50,69 +87,4 @@ class Config:
             Configuration value or default
         """
         # Map old path-based access to new flat structure
-        if len(path) == 2:
-            section, key = path
-            
-            if section == 'api':
-                if key == 'base_url':
-                    return self.api_base_url
-                elif key == 'token':
-                    return self.api_token
-                elif key == 'timeout':
-                    return self.api_timeout
-                elif key == 'start_path':
-                    return '/session/start'
-                elif key == 'end_path':
-                    return '/session/end'
-                elif key == 'retry_count':
-                    return 3
-                elif key == 'retry_delay':
-                    return 1
-                    
-            elif section == 'websocket':
-                if key == 'url':
-                    return self.ws_url
-                elif key == 'reconnect_interval':
-                    return 5
-                elif key == 'max_reconnect_delay':
-                    return 300
-                elif key == 'ping_interval':
-                    return 30
-                    
-            elif section == 'session':
-                if key == 'monitor_interval':
-                    return self.monitor_interval
-                elif key == 'claude_home':
-                    return self.claude_home
-                elif key == 'monitored_projects':
-                    return self.monitored_projects
-                elif key == 'cache_dir':
-                    return self.cache_dir
-                elif key == 'enable_cache':
-                    return True
-                    
-            elif section == 'executor':
-                if key == 'default_timeout':
-                    return self.command_timeout
-                elif key == 'max_timeout':
-                    return 600
-                elif key == 'max_output_size':
-                    return self.max_output_size
-                elif key == 'blocked_commands':
-                    return [
-                        'rm', 'del', 'format', 'fdisk', 'dd', 'mkfs',
-                        'shutdown', 'reboot', 'init', 'systemctl',
-                        'passwd', 'useradd', 'userdel', 'usermod',
-                        'chown', 'chmod', 'chgrp'
-                    ]
-                elif key == 'allowed_commands':
-                    return []
-                elif key == 'work_dir':
-                    return ''
-                    
-            elif section == 'logging':
-                if key == 'level':
-                    return self.log_level
-        
-        # Default return for unknown paths
-        return None
\ No newline at end of file
+        return self._values.get(path)
@@ -3,8 +3,24 @@
 import asyncio
 import logging
 import os
+import re
+import shlex
+import shutil
+import stat
+import sys
 import time
-from typing import Dict, Any, Optional, List
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple
+
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as async_timeout
+else:
+    from async_timeout import timeout as async_timeout
+
+try:
+    import ahocorasick
+except ImportError:  # Optional accelerator; fall back to a regex union
+    ahocorasick = None
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +37,9 @@ class CommandExecutor:
         ':(){ :|:& };:'  # Fork bomb
     ]
     
+    # Read size for streaming command output
+    READ_CHUNK_SIZE = 1 << 16
+    
     def __init__(self, config):
         """
         Initialize command executor.
@@ -29,6 +48,9 @@ class CommandExecutor:
             config: Configuration object
         """
         self.config = config
+        self._danger_matcher = self._build_danger_matcher(self.DANGEROUS_PATTERNS)
+        self._refresh_cached_config()
+        
         self.metrics = {
             'commands_executed': 0,
             'commands_failed': 0,
@@ -36,6 +58,52 @@ class CommandExecutor:
             'last_executed': None
         }
     
+    def _refresh_cached_config(self):
+        """Cache executor settings so they are not looked up on every command."""
+        self._default_timeout = self.config.get('executor', 'default_timeout')
+        self._max_timeout = self.config.get('executor', 'max_timeout')
+        self._default_work_dir = self.config.get('executor', 'work_dir')
+        self._max_output_size = self.config.get('executor', 'max_output_size')
+        
+        # Precompute lowercased command lists for O(1) lookups
+        self._blocked_commands = frozenset(
+            b.lower() for b in self.config.get('executor', 'blocked_commands') or ()
+        )
+        self._allowed_commands = frozenset(
+            a.lower() for a in self.config.get('executor', 'allowed_commands') or ()
+        )
+    
+    @staticmethod
+    def _build_danger_matcher(patterns: List[str]):
+        """
+        Build a matcher that finds any dangerous pattern in a single pass.
+        
+        Args:
+            patterns: Substrings to detect
+            
+        Returns:
+            Callable returning the first matched pattern or None
+        """
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for pattern in patterns:
+                automaton.add_word(pattern.lower(), pattern)
+            automaton.make_automaton()
+            
+            def match(text: str) -> Optional[str]:
+                for _, pattern in automaton.iter(text):
+                    return pattern
+                return None
+        else:
+            originals = {p.lower(): p for p in patterns}
+            danger_re = re.compile('|'.join(map(re.escape, originals)))
+            
+            def match(text: str) -> Optional[str]:
+                found = danger_re.search(text)
+                return originals[found.group(0)] if found else None
+        
+        return match
+    
     async def execute(
         self, 
         command: str, 
@@ -55,88 +123,141 @@ class CommandExecutor:
         Returns:
             Dictionary with execution results
         """
-        start_time = time.time()
+        start_ns = time.monotonic_ns()
         
         # Validate command
         if not self._validate_command(command):
             return self._create_error_response(
                 'Command blocked by security policy',
-                start_time
+                start_ns
             )
         
         # Prepare timeout
         if timeout is None:
-            timeout = self.config.get('executor', 'default_timeout')
-        timeout = min(timeout, self.config.get('executor', 'max_timeout'))
+            timeout = self._default_timeout
+        timeout = min(timeout, self._max_timeout)
         
         # Prepare working directory
         if not work_dir:
-            work_dir = self.config.get('executor', 'work_dir') or os.getcwd()
+            work_dir = self._default_work_dir or os.getcwd()
         
         # Validate working directory
         if not self._validate_path(work_dir):
             return self._create_error_response(
                 'Invalid working directory',
-                start_time
+                start_ns
             )
         
+        # Build argv for direct exec when args are given
+        argv = None
+        if args:
+            if not isinstance(args, list) or not all(isinstance(a, str) for a in args):
+                return self._create_error_response(
+                    'Invalid command arguments',
+                    start_ns
+                )
+            try:
+                argv = shlex.split(command) + args
+            except ValueError as e:
+                return self._create_error_response(
+                    f'Invalid command: {e}',
+                    start_ns
+                )
+            executable = self._resolve_executable(argv[0], work_dir) if argv else None
+            if executable is None:
+                return self._create_error_response(
+                    f'Command not found: {argv[0] if argv else command}',
+                    start_ns
+                )
+            # Re-check policy on what will actually run: the unquoted program and its args
+            if not self._validate_command(' '.join(argv), base_cmd=executable):
+                return self._create_error_response(
+                    'Command blocked by security policy',
+                    start_ns
+                )
+            argv[0] = executable
+        
         try:
-            # Build command
-            if args:
-                cmd = [command] + args
-                cmd_str = ' '.join(cmd)
+            # Execute command (no intermediate shell when args are given)
+            if argv:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=work_dir
+                )
             else:
-                cmd_str = command
-            
-            # Execute command
-            process = await asyncio.create_subprocess_shell(
-                cmd_str,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=work_dir
-            )
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=work_dir
+                )
             
             # Wait for completion with timeout
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=timeout
-                )
+                async with async_timeout(timeout):
+                    (stdout, stdout_truncated), (stderr, stderr_truncated) = await asyncio.gather(
+                        self._read_capped(process.stdout),
+                        self._read_capped(process.stderr)
+                    )
+                    await process.wait()
             except asyncio.TimeoutError:
                 process.kill()
                 await process.wait()
                 return self._create_error_response(
                     f'Command timed out after {timeout} seconds',
-                    start_time
+                    start_ns
                 )
             
             # Process output
-            stdout_text = self._decode_and_limit(stdout)
-            stderr_text = self._decode_and_limit(stderr)
+            stdout_text = self._decode_output(stdout, stdout_truncated)
+            stderr_text = self._decode_output(stderr, stderr_truncated)
             
             # Update metrics
-            self._update_metrics(process.returncode == 0, start_time)
+            self._update_metrics(process.returncode == 0, start_ns)
             
             return {
                 'stdout': stdout_text,
                 'stderr': stderr_text,
                 'return_code': process.returncode,
-                'duration_ms': int((time.time() - start_time) * 1000),
+                'duration_ms': (time.monotonic_ns() - start_ns) // 1_000_000,
                 'timestamp': int(time.time())
             }
             
         except Exception as e:
             logger.error(f"Command execution error: {e}")
-            self._update_metrics(False, start_time)
+            self._update_metrics(False, start_ns)
+            
+            return self._create_error_response(str(e), start_ns)
+    
+    @staticmethod
+    def _resolve_executable(name: str, work_dir: str) -> Optional[str]:
+        """
+        Resolve an executable the way exec would, relative to work_dir.
+        
+        Args:
+            name: Program name or path
+            work_dir: Working directory the command will run in
             
-            return self._create_error_response(str(e), start_time)
+        Returns:
+            Path to the executable, or None if it cannot be run
+        """
+        if os.sep in name:
+            path = os.path.join(work_dir, name)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+            return None
+        return shutil.which(name)
     
-    def _validate_command(self, command: str) -> bool:
+    def _validate_command(self, command: str, base_cmd: Optional[str] = None) -> bool:
         """
         Validate command against security policies.
         
         Args:
             command: Command to validate
+            base_cmd: Program to check against the command lists
+                (defaults to the first word of command)
             
         Returns:
             True if command is allowed
@@ -145,27 +266,25 @@ class CommandExecutor:
             return False
         
         # Extract base command
-        base_cmd = command.split()[0] if command else ''
+        if base_cmd is None:
+            base_cmd = command.split()[0]
         base_cmd = os.path.basename(base_cmd).lower()
         
         # Check blocked commands
-        blocked = self.config.get('executor', 'blocked_commands')
-        if base_cmd in [b.lower() for b in blocked]:
+        if base_cmd in self._blocked_commands:
             logger.warning(f"Blocked command: {base_cmd}")
             return False
         
         # Check allowed commands if whitelist is configured
-        allowed = self.config.get('executor', 'allowed_commands')
-        if allowed and base_cmd not in [a.lower() for a in allowed]:
+        if self._allowed_commands and base_cmd not in self._allowed_commands:
             logger.warning(f"Command not in allowed list: {base_cmd}")
             return False
         
         # Check for dangerous patterns
-        command_lower = command.lower()
-        for pattern in self.DANGEROUS_PATTERNS:
-            if pattern.lower() in command_lower:
-                logger.warning(f"Dangerous pattern detected: {pattern}")
-                return False
+        pattern = self._danger_matcher(command.lower())
+        if pattern is not None:
+            logger.warning(f"Dangerous pattern detected: {pattern}")
+            return False
         
         return True
     
@@ -180,51 +299,71 @@ class CommandExecutor:
             True if path is valid
         """
         try:
-            # Resolve to absolute path
-            abs_path = os.path.abspath(path)
-            
-            # Check if it exists and is a directory
-            if not os.path.exists(abs_path) or not os.path.isdir(abs_path):
+            # Check for path traversal (a '..' component, not just the substring)
+            if '..' in Path(path).parts:
                 return False
             
-            # Check for path traversal
-            if '..' in path:
-                return False
-            
-            return True
+            # Check if it exists and is a directory with a single stat call
+            return stat.S_ISDIR(os.stat(path).st_mode)
         except Exception:
             return False
     
-    def _decode_and_limit(self, data: bytes) -> str:
+    async def _read_capped(self, stream: asyncio.StreamReader) -> Tuple[bytes, bool]:
         """
-        Decode bytes and limit output size.
+        Read a process stream, keeping at most max_output_size bytes.
+        
+        Output past the limit is drained and discarded so the child can
+        still run to completion without buffering it all in memory.
+        
+        Args:
+            stream: Process stdout or stderr stream
+            
+        Returns:
+            Tuple of (kept bytes, whether output was truncated)
+        """
+        limit = self._max_output_size
+        chunks = []
+        size = 0
+        
+        while True:
+            chunk = await stream.read(self.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            
+            keep = limit - size
+            if keep > 0:
+                chunks.append(chunk[:keep])
+            size += len(chunk)
+        
+        return b''.join(chunks), size > limit
+    
+    def _decode_output(self, data: bytes, truncated: bool) -> str:
+        """
+        Decode captured output.
         
         Args:
             data: Raw bytes output
+            truncated: Whether output was cut at max_output_size
             
         Returns:
-            Decoded and limited string
+            Decoded string
         """
         if not data:
             return ''
         
-        # Decode
         text = data.decode('utf-8', errors='replace')
-        
-        # Limit size
-        max_size = self.config.get('executor', 'max_output_size')
-        if len(text) > max_size:
-            text = text[:max_size] + '\n[Output truncated]'
+        if truncated:
+            text += '\n[Output truncated]'
         
         return text
     
-    def _create_error_response(self, error_msg: str, start_time: float) -> Dict[str, Any]:
+    def _create_error_response(self, error_msg: str, start_ns: int) -> Dict[str, Any]:
         """
         Create an error response.
         
         Args:
             error_msg: Error message
-            start_time: Command start time
+            start_ns: Command start time (time.monotonic_ns())
             
         Returns:
             Error response dictionary
@@ -234,23 +373,23 @@ class CommandExecutor:
             'stderr': error_msg,
             'return_code': -1,
             'error': error_msg,
-            'duration_ms': int((time.time() - start_time) * 1000),
+            'duration_ms': (time.monotonic_ns() - start_ns) // 1_000_000,
             'timestamp': int(time.time())
         }
     
-    def _update_metrics(self, success: bool, start_time: float):
+    def _update_metrics(self, success: bool, start_ns: int):
         """
         Update execution metrics.
         
         Args:
             success: Whether command succeeded
-            start_time: Command start time
+            start_ns: Command start time (time.monotonic_ns())
         """
         self.metrics['commands_executed'] += 1
         if not success:
             self.metrics['commands_failed'] += 1
         
-        duration = int((time.time() - start_time) * 1000)
+        duration = (time.monotonic_ns() - start_ns) // 1_000_000
         self.metrics['total_duration'] += duration
         self.metrics['last_executed'] = time.time()
     
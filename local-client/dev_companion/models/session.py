@@ -6,6 +6,12 @@ from enum import Enum
 from dataclasses import dataclass, field, asdict
 from typing import List, Dict, Any, Optional
 
+# Environment details that do not change for the lifetime of the process
+_OS = platform.system()
+_ARCH = platform.machine()
+_HOST = platform.node()
+_USER = os.getenv('USER', '')
+
 
 class SessionStatus(Enum):
     """Session status enumeration."""
@@ -15,7 +21,7 @@ class SessionStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True)
 class GitInfo:
     """Git repository information."""
     branch: str = ""
@@ -25,17 +31,17 @@ class GitInfo:
     is_dirty: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class EnvironmentInfo:
     """System environment information."""
-    os: str = field(default_factory=lambda: platform.system())
-    architecture: str = field(default_factory=lambda: platform.machine())
-    hostname: str = field(default_factory=lambda: platform.node())
-    username: str = field(default_factory=lambda: os.getenv('USER', ''))
+    os: str = _OS
+    architecture: str = _ARCH
+    hostname: str = _HOST
+    username: str = _USER
     working_dir: str = field(default_factory=lambda: os.getcwd())
 
 
-@dataclass
+@dataclass(slots=True)
 class SessionMetadata:
     """Session metadata."""
     tool_calls: List[Dict[str, Any]] = field(default_factory=list)
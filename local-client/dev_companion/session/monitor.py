@@ -1,20 +1,50 @@
 """Session monitoring functionality - monitors Claude JSONL files only."""
 
 import asyncio
+import heapq
 import logging
 import os
-import subprocess
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from dataclasses import asdict
-from typing import Optional, Dict, Any, Set, List
+from dataclasses import asdict, dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+import orjson
+from watchfiles import awatch, Change
+
+if sys.version_info >= (3, 11):
+    from asyncio import timeout as async_timeout
+else:
+    from async_timeout import timeout as async_timeout
 
 from ..models import SessionStatus, GitInfo, EnvironmentInfo, SessionMetadata
 from ..claude_parser import ClaudeSessionParser, ClaudeSession
 
 logger = logging.getLogger(__name__)
 
+# Session termination reason -> status value sent to the server
+_REASON_TO_STATUS = {
+    'completed': SessionStatus.COMPLETED.value,
+    'inactive': SessionStatus.COMPLETED.value,
+    'failed': SessionStatus.FAILED.value,
+    'error': SessionStatus.FAILED.value,
+    'cancelled': SessionStatus.CANCELLED.value,
+    'shutdown': SessionStatus.CANCELLED.value
+}
+_DEFAULT_STATUS = SessionStatus.COMPLETED.value
+
+
+@dataclass(slots=True)
+class _TrackedSession:
+    """Monitor state for a single Claude session file."""
+    claude_session: Optional[ClaudeSession] = None  # Set once the session is active
+    server_id: Optional[str] = None  # Server's session ID once session start succeeded
+    sent: bool = False  # Whether session start has been sent
+    last_modified: float = 0.0  # Session file modification time
+    session_file: Optional[Path] = None  # Path of the session's JSONL file
+
 
 class SessionMonitor:
     """Monitors Claude sessions by watching JSONL files."""
@@ -36,10 +66,18 @@ class SessionMonitor:
         claude_home = config.get('session', 'claude_home')
         self.claude_parser = ClaudeSessionParser(claude_home)
         self.monitored_projects: List[str] = []
-        self.active_sessions: Dict[str, ClaudeSession] = {}
-        self.server_session_ids: Dict[str, str] = {}  # Map Claude session ID -> Server session ID
-        self.sent_sessions: Set[str] = set()  # Track sessions we've already sent start for
-        self.session_last_modified: Dict[str, float] = {}  # Track file modification times
+        self._sessions: Dict[str, _TrackedSession] = {}  # Claude session ID -> tracked state, active ones last
+        self._expiry_heap: List[Tuple[float, str]] = []  # (mtime, session ID), stale entries skipped lazily
+        self._seen_files: Dict[Path, float] = {}  # Files we've already seen with their last mtime
+        self._project_dir_listing: Dict[str, Tuple[int, List[Path]]] = {}  # Project -> (dir mtime, session files)
+        self._stop_event = asyncio.Event()
+        
+        # Session cache directory (created once up front)
+        self._cache_dir = Path(config.get('session', 'cache_dir'))
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not create session cache directory {self._cache_dir}: {e}")
     
     async def start(self):
         """Start monitoring Claude sessions."""
@@ -60,26 +98,31 @@ class SessionMonitor:
     def stop(self):
         """Stop monitoring sessions."""
         self.running = False
+        self._stop_event.set()
         
         # End any active sessions
-        for session_id, session in self.active_sessions.items():
-            if session_id in self.sent_sessions:
-                asyncio.create_task(self._end_claude_session(session, 'shutdown'))
+        for tracked in self._sessions.values():
+            if tracked.claude_session is not None and tracked.sent:
+                asyncio.create_task(self._end_claude_session(tracked, 'shutdown'))
+    
+    def sent_session_ids(self) -> List[str]:
+        """Return IDs of active sessions whose session start has been sent."""
+        return [
+            session_id for session_id, tracked in self._sessions.items()
+            if tracked.claude_session is not None and tracked.sent
+        ]
     
     async def _monitor_claude_files(self):
         """Monitor Claude JSONL session files."""
         monitor_interval = self.config.get('session', 'monitor_interval') or 0.5
-        seen_files = {}  # Track files we've already seen with their initial mtime
-        startup_time = time.time()  # Record when monitoring started
         
         # On startup, check existing files but DON'T send starts yet
         # We'll send starts when they actually get modified
         logger.info(f"Checking existing sessions on startup...")
         for project_path in self.monitored_projects:
-            existing_files = self.claude_parser.find_session_files(project_path)
-            for session_file in existing_files:
-                mtime = session_file.stat().st_mtime
-                seen_files[session_file] = mtime
+            existing_files = self.claude_parser.find_session_entries(project_path)
+            for session_file, mtime in existing_files:
+                self._seen_files[session_file] = mtime
                 
                 # Log what we found
                 file_age = time.time() - mtime
@@ -88,109 +131,214 @@ class SessionMonitor:
                 # Don't pre-load sessions - let them be detected when modified
         
         # Start monitoring for changes
+        projects_dir = self.claude_parser.projects_dir
+        if projects_dir.exists():
+            await self._watch_claude_files(projects_dir, monitor_interval)
+        else:
+            # Nothing to watch yet (Claude has never run here), fall back to polling
+            await self._poll_claude_files(monitor_interval)
+    
+    async def _watch_claude_files(self, projects_dir: Path, monitor_interval: float):
+        """Process session file changes as filesystem events arrive."""
+        project_dir_names = {
+            self.claude_parser.get_project_path(project_path).name
+            for project_path in self.monitored_projects
+        }
         
-        while self.running:
+        # Wake up at least every monitor_interval to check for inactive sessions
+        async for changes in awatch(
+            projects_dir,
+            stop_event=self._stop_event,
+            rust_timeout=int(monitor_interval * 1000),
+            yield_on_timeout=True
+        ):
             try:
-                for project_path in self.monitored_projects:
-                    # Find all session files for this project
-                    session_files = self.claude_parser.find_session_files(project_path)
+                for change, path in changes:
+                    session_file = Path(path)
+                    if (
+                        session_file.suffix != '.jsonl'
+                        or session_file.parent.name not in project_dir_names
+                    ):
+                        continue
                     
-                    for session_file in session_files:
+                    if change == Change.deleted:
+                        self._forget_session_file(session_file)
+                        continue
+                    
+                    try:
                         current_mtime = session_file.stat().st_mtime
-                        file_age = time.time() - current_mtime
-                        session_id = session_file.stem
-                        
-                        # Track this session's file modification time
-                        self.session_last_modified[session_id] = current_mtime
-                        
-                        # Check if this is a NEW file (not seen before or modified after we saw it)
-                        is_new_file = session_file not in seen_files
-                        is_modified = session_file in seen_files and current_mtime > seen_files[session_file]
-                        
-                        if is_new_file:
-                            logger.info(f"New session file detected: {session_file.name}")
-                            seen_files[session_file] = current_mtime
-                        elif is_modified:
-                            seen_files[session_file] = current_mtime
-                        
-                        # Process if it's new/modified (regardless of age for modified files)
-                        # For new files, only process if recently created
-                        should_process = is_modified or (is_new_file and file_age < 120)
-                        
-                        if should_process:
-                            # Parse the session
-                            claude_session = self.claude_parser.parse_session_file(session_file)
-                            
-                            if claude_session:
-                                session_id = claude_session.session_id
-                                
-                                # Check if this is a new session to track
-                                if session_id not in self.active_sessions:
-                                    logger.info(f"Tracking new session: {session_id[:8]}...")
-                                    self.active_sessions[session_id] = claude_session
-                                    
-                                    # Send session start if not already sent
-                                    if session_id not in self.sent_sessions:
-                                        await self._start_claude_session(claude_session)
-                                        self.sent_sessions.add(session_id)
-                                else:
-                                    # Update existing session
-                                    old_message_count = len(self.active_sessions[session_id].messages) if session_id in self.active_sessions else 0
-                                    self.active_sessions[session_id] = claude_session
-                                    
-                                    # If this session wasn't sent yet (file existed but wasn't active), send start now
-                                    if session_id not in self.sent_sessions:
-                                        logger.info(f"Session {session_id[:8]}... became active, sending start")
-                                        await self._start_claude_session(claude_session)
-                                        self.sent_sessions.add(session_id)
-                                    elif len(claude_session.messages) > old_message_count:
-                                        # New messages added
-                                        ...
-
-                # Check ALL tracked sessions for inactivity based on file modification time
-                current_time = time.time()
-                inactive_timeout = 5
-                sessions_to_end = []
+                    except FileNotFoundError:
+                        self._forget_session_file(session_file)
+                        continue
+                    
+                    await self._process_session_file(session_file, current_mtime)
                 
-                for session_id in list(self.active_sessions.keys()):
-                    if session_id in self.session_last_modified:
-                        # Check how long since the file was last modified
-                        time_since_modified = current_time - self.session_last_modified[session_id]
-                        if time_since_modified > inactive_timeout and session_id in self.sent_sessions:
-                            sessions_to_end.append(session_id)
+                await self._end_inactive_sessions()
                 
-                # End inactive sessions
-                for session_id in sessions_to_end:
-                    logger.info(f"Ending inactive session: {session_id[:8]}... (inactive for {(current_time - self.session_last_modified[session_id]):.0f}s)")
-                    
-                    # Get server session ID before calling _end_claude_session (which deletes it)
-                    server_session_id = self.server_session_ids.get(session_id)
-                    
-                    await self._end_claude_session(self.active_sessions[session_id], 'inactive')
-                    
-                    # Notify WebSocket client if connected
-                    logger.info("Before Sending session finished notification to WebSocket client")
-                    if self.ws_client and server_session_id:
-                        logger.info(f"Sending session finished notification to WebSocket client for server session: {server_session_id}")
-                        await self.ws_client.send_session_finished(server_session_id)
+            except Exception as e:
+                logger.error(f"Claude file monitor error: {e}", exc_info=True)
+    
+    async def _poll_claude_files(self, monitor_interval: float):
+        """Process session file changes by polling the project directories."""
+        while self.running:
+            try:
+                for project_path in self.monitored_projects:
+                    # Find all session files for this project
+                    session_files = self._list_session_files(project_path)
                     
-                    del self.active_sessions[session_id]
-                    if session_id in self.session_last_modified:
-                        del self.session_last_modified[session_id]
-                    self.sent_sessions.discard(session_id)
+                    for session_file in session_files:
+                        try:
+                            current_mtime = session_file.stat().st_mtime
+                        except FileNotFoundError:
+                            self._forget_session_file(session_file)
+                            continue
+                        await self._process_session_file(session_file, current_mtime)
                 
+                await self._end_inactive_sessions()
                 await asyncio.sleep(monitor_interval)
                 
             except Exception as e:
                 logger.error(f"Claude file monitor error: {e}", exc_info=True)
                 await asyncio.sleep(monitor_interval or 0.5)
     
-    async def _start_claude_session(self, claude_session: ClaudeSession):
+    def _list_session_files(self, project_path: str) -> List[Path]:
+        """
+        List session files for a project, re-scanning only when its directory changes.
+        
+        Args:
+            project_path: Original project path
+            
+        Returns:
+            List of session file paths
+        """
+        try:
+            dir_mtime = os.stat(self.claude_parser.get_project_path(project_path)).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        
+        # Creating or removing a session file bumps the directory mtime
+        cached = self._project_dir_listing.get(project_path)
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+        
+        session_files = self.claude_parser.find_session_files(project_path)
+        self._project_dir_listing[project_path] = (dir_mtime, session_files)
+        return session_files
+    
+    def _forget_session_file(self, session_file: Path):
+        """Drop cached state for a session file that no longer exists."""
+        self._seen_files.pop(session_file, None)
+        self.claude_parser.forget_session_file(session_file)
+    
+    async def _process_session_file(self, session_file: Path, current_mtime: float):
+        """Track a session file and send session start when it becomes active."""
+        file_age = time.time() - current_mtime
+        session_id = session_file.stem
+        seen_files = self._seen_files
+        
+        tracked = self._sessions.get(session_id)
+        if tracked is None:
+            tracked = self._sessions[session_id] = _TrackedSession(session_file=session_file)
+        
+        # Track this session's file modification time
+        if tracked.last_modified != current_mtime:
+            tracked.last_modified = current_mtime
+            heapq.heappush(self._expiry_heap, (current_mtime, session_id))
+        
+        # Check if this is a NEW file (not seen before or modified after we saw it)
+        is_new_file = session_file not in seen_files
+        is_modified = session_file in seen_files and current_mtime > seen_files[session_file]
+        
+        if is_new_file:
+            logger.info(f"New session file detected: {session_file.name}")
+            seen_files[session_file] = current_mtime
+        elif is_modified:
+            seen_files[session_file] = current_mtime
+        
+        # Process if it's new/modified (regardless of age for modified files)
+        # For new files, only process if recently created
+        should_process = is_modified or (is_new_file and file_age < 120)
+        
+        if should_process:
+            # The parser updates the session in place, so note the message count first
+            previous_session = tracked.claude_session
+            old_message_count = previous_session.message_count if previous_session else 0
+            
+            # Parse only what was appended since the last update
+            claude_session = self.claude_parser.update_session_file(session_file)
+            
+            if claude_session:
+                # Check if this is a new session to track
+                if previous_session is None:
+                    logger.info(f"Tracking new session: {session_id[:8]}...")
+                    tracked.claude_session = claude_session
+                    
+                    # Move to the end so active sessions stay ordered by activation
+                    del self._sessions[session_id]
+                    self._sessions[session_id] = tracked
+                    
+                    # Send session start if not already sent
+                    if not tracked.sent:
+                        await self._start_claude_session(tracked)
+                        tracked.sent = True
+                else:
+                    # Update existing session
+                    tracked.claude_session = claude_session
+                    
+                    # If this session wasn't sent yet (file existed but wasn't active), send start now
+                    if not tracked.sent:
+                        logger.info(f"Session {session_id[:8]}... became active, sending start")
+                        await self._start_claude_session(tracked)
+                        tracked.sent = True
+                    elif claude_session.message_count > old_message_count:
+                        # New messages added
+                        ...
+    
+    async def _end_inactive_sessions(self):
+        """End tracked sessions whose files have not been modified recently."""
+        # Pop sessions in order of file modification time until we reach one that is still fresh
+        current_time = time.time()
+        inactive_timeout = 5
+        expiry_heap = self._expiry_heap
+        sessions_to_end = []
+        
+        while expiry_heap and current_time - expiry_heap[0][0] > inactive_timeout:
+            mtime, session_id = heapq.heappop(expiry_heap)
+            # Skip entries superseded by a later modification
+            tracked = self._sessions.get(session_id)
+            if tracked is None or tracked.last_modified != mtime:
+                continue
+            if tracked.claude_session is not None and tracked.sent:
+                sessions_to_end.append((session_id, tracked))
+        
+        # End inactive sessions
+        for session_id, tracked in sessions_to_end:
+            logger.info(f"Ending inactive session: {session_id[:8]}... (inactive for {(current_time - tracked.last_modified):.0f}s)")
+            
+            # Get server session ID before calling _end_claude_session (which clears it)
+            server_session_id = tracked.server_id
+            
+            await self._end_claude_session(tracked, 'inactive')
+            
+            # Notify WebSocket client if connected
+            logger.info("Before Sending session finished notification to WebSocket client")
+            if self.ws_client and server_session_id:
+                logger.info(f"Sending session finished notification to WebSocket client for server session: {server_session_id}")
+                await self.ws_client.send_session_finished(server_session_id)
+            
+            self._sessions.pop(session_id, None)
+            
+            # A later write to the file starts a new session from a full parse
+            if tracked.session_file is not None:
+                self.claude_parser.forget_session_file(tracked.session_file)
+    
+    async def _start_claude_session(self, tracked: _TrackedSession):
         """Send session start event for a Claude session."""
+        claude_session = tracked.claude_session
         logger.info(f"Session started: {claude_session.session_id[:8]}...")
         
         # Get git info from the session's working directory
-        git_info = self._get_git_info(claude_session.cwd)
+        git_info = await self._get_git_info(claude_session.cwd)
         
         # According to OpenAPI spec, only user_prompt is required for session/start
         request_data = {
@@ -201,8 +349,7 @@ class SessionMonitor:
             response = await self.api_client.send_session_start(request_data)
             if response and 'session_id' in response:
                 # Store the server's session ID mapped to Claude's session ID
-                server_session_id = response['session_id']
-                self.server_session_ids[claude_session.session_id] = server_session_id
+                tracked.server_id = response['session_id']
                 # Session start successful
             else:
                 logger.error(f"No session_id in response for Claude session: {claude_session.session_id}")
@@ -217,13 +364,14 @@ class SessionMonitor:
             logger.error(traceback.format_exc())
             logger.error(f"Failed to send session start: {e}")
     
-    async def _end_claude_session(self, claude_session: ClaudeSession, reason: str = 'completed'):
+    async def _end_claude_session(self, tracked: _TrackedSession, reason: str = 'completed'):
         """Send session end event for a Claude session."""
         # Only send session end if we have a server session ID (meaning we sent session start)
-        if claude_session.session_id not in self.server_session_ids:
+        server_session_id = tracked.server_id
+        if server_session_id is None:
             return
-            
-        server_session_id = self.server_session_ids[claude_session.session_id]
+        
+        claude_session = tracked.claude_session
         logger.info(f"Sending session end for {claude_session.session_id[:8]}... (reason: {reason})")
         
         # Create metadata from Claude session (optional per OpenAPI spec)
@@ -245,11 +393,11 @@ class SessionMonitor:
         try:
             await self.api_client.send_session_end(request_data)
             # Clean up the mapping
-            del self.server_session_ids[claude_session.session_id]
+            tracked.server_id = None
         except Exception as e:
             logger.error(f"Failed to send session end: {e}")
     
-    def _get_git_info(self, working_dir: Optional[str] = None) -> GitInfo:
+    async def _get_git_info(self, working_dir: Optional[str] = None) -> GitInfo:
         """Get git repository information."""
         git_info = GitInfo()
         
@@ -257,82 +405,88 @@ class SessionMonitor:
         cwd = working_dir or os.getcwd()
         
         try:
-            # Get branch
-            result = subprocess.run(
-                ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-                capture_output=True, text=True, timeout=5, cwd=cwd
+            # Run the git queries concurrently; the log call covers hash, author and message
+            branch, last_commit, status = await asyncio.gather(
+                self._run_git(cwd, 'rev-parse', '--abbrev-ref', 'HEAD'),
+                self._run_git(cwd, 'log', '-1', '--format=%H%x00%an%x00%B'),
+                self._run_git(cwd, 'status', '--porcelain')
             )
-            if result.returncode == 0:
-                git_info.branch = result.stdout.strip()
             
-            # Get commit hash
-            result = subprocess.run(
-                ['git', 'rev-parse', 'HEAD'],
-                capture_output=True, text=True, timeout=5, cwd=cwd
-            )
-            if result.returncode == 0:
-                git_info.commit_hash = result.stdout.strip()
+            if branch is not None:
+                git_info.branch = branch.strip()
             
-            # Get commit message
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=%B'],
-                capture_output=True, text=True, timeout=5, cwd=cwd
-            )
-            if result.returncode == 0:
-                git_info.commit_message = result.stdout.strip()
-            
-            # Get author
-            result = subprocess.run(
-                ['git', 'log', '-1', '--pretty=%an'],
-                capture_output=True, text=True, timeout=5, cwd=cwd
-            )
-            if result.returncode == 0:
-                git_info.author = result.stdout.strip()
+            if last_commit is not None:
+                commit_hash, author, message = last_commit.split('\x00', 2)
+                git_info.commit_hash = commit_hash.strip()
+                git_info.author = author.strip()
+                git_info.commit_message = message.strip()
             
             # Check if dirty
-            result = subprocess.run(
-                ['git', 'status', '--porcelain'],
-                capture_output=True, text=True, timeout=5, cwd=cwd
-            )
-            if result.returncode == 0:
-                git_info.is_dirty = len(result.stdout.strip()) > 0
+            if status is not None:
+                git_info.is_dirty = len(status.strip()) > 0
                 
         except Exception:
             pass  # Silently handle git errors
         
         return git_info
     
+    async def _run_git(self, cwd: str, *args: str) -> Optional[str]:
+        """
+        Run a git command without blocking the event loop.
+        
+        Args:
+            cwd: Directory to run git in
+            *args: Git subcommand and arguments
+            
+        Returns:
+            Decoded stdout, or None if git failed or timed out
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'git', *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                cwd=cwd
+            )
+        except OSError:
+            return None
+        
+        try:
+            async with async_timeout(5):
+                stdout, _ = await process.communicate()
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return None
+        
+        if process.returncode != 0:
+            return None
+        return stdout.decode('utf-8', errors='replace')
+    
     def _map_reason_to_status(self, reason: str) -> str:
         """Map termination reason to session status."""
-        mapping = {
-            'completed': SessionStatus.COMPLETED.value,
-            'inactive': SessionStatus.COMPLETED.value,
-            'failed': SessionStatus.FAILED.value,
-            'error': SessionStatus.FAILED.value,
-            'cancelled': SessionStatus.CANCELLED.value,
-            'shutdown': SessionStatus.CANCELLED.value
-        }
-        return mapping.get(reason, SessionStatus.COMPLETED.value)
+        return _REASON_TO_STATUS.get(reason, _DEFAULT_STATUS)
     
     def _cache_session(self, session_data: Dict[str, Any]):
         """Cache session data to disk."""
-        cache_dir = Path(self.config.get('session', 'cache_dir'))
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        cache_file = cache_dir / f"{session_data['session_id']}.json"
+        cache_file = self._cache_dir / f"{session_data['session_id']}.json"
         try:
-            import json
-            cache_file.write_text(json.dumps(session_data, indent=2))
+            cache_file.write_bytes(orjson.dumps(session_data, option=orjson.OPT_INDENT_2))
         except Exception:
             pass  # Silently handle cache errors
     
     # Methods for WebSocket client to record metrics
     def record_command(self, command: str):
         """Record a command execution from WebSocket."""
-        # Find the most recent active session
-        if self.active_sessions:
-            latest_session = list(self.active_sessions.values())[-1]
-            if command not in latest_session.commands_executed:
+        # Find the most recent active session (active sessions are kept last, in activation order)
+        latest_session = next(
+            (tracked.claude_session for tracked in reversed(self._sessions.values())
+             if tracked.claude_session is not None),
+            None
+        )
+        if latest_session is not None:
+            if command not in latest_session._commands_executed_set:
+                latest_session._commands_executed_set.add(command)
                 latest_session.commands_executed.append(command)
     
     def record_error(self):
@@ -1,21 +1,38 @@
 """WebSocket client for receiving and executing commands."""
 
 import asyncio
-import json
 import logging
+import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
 
+import orjson
 import websockets
 
 from ..executor import CommandExecutor
 
 logger = logging.getLogger(__name__)
 
+# Session messages have a fixed shape, so IDs needing no JSON escaping are spliced in directly
+_PLAIN_ID_RE = re.compile(r'[A-Za-z0-9_-]+')
+_SESSION_ACTIVE_PREFIX = '{"message_type":"session_active","session_id":"'
+_SESSION_FINISHED_PREFIX = '{"message_type":"session_finished","session_id":"'
+_COMMAND_EXECUTED_PREFIX = b'{"message_type":"command_executed","output":'
+
+
+def _session_message(prefix: str, message_type: str, session_id: str) -> str:
+    """Serialize a session_* message, skipping the JSON encoder for plain IDs."""
+    if isinstance(session_id, str) and _PLAIN_ID_RE.fullmatch(session_id):
+        return prefix + session_id + '"}'
+    return orjson.dumps({'message_type': message_type, 'session_id': session_id}).decode()
+
 
 class WebSocketClient:
     """WebSocket client for receiving commands from server."""
     
+    # Maximum number of outbound messages waiting to be sent
+    SEND_QUEUE_SIZE = 1000
+    
     def __init__(self, config, session_monitor):
         """
         Initialize WebSocket client.
@@ -29,9 +46,16 @@ class WebSocketClient:
         self.session_monitor.ws_client = self  # Set reference for session finished notifications
         self.executor = CommandExecutor(config)
         self.running = False
-        self.reconnect_delay = config.get('websocket', 'reconnect_interval')
+        self._refresh_cached_config()
+        self.reconnect_delay = self._reconnect_interval
         self.max_reconnect_delay = config.get('websocket', 'max_reconnect_delay')
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
+        self._send_queue: Optional[asyncio.Queue] = None  # Outbound messages for the current connection
+        self._message_handlers = {
+            'execute_command': self._handle_execute_command,
+            'session_finished': self._handle_session_finished
+        }
+        self._unknown_message_types: Set[str] = set()  # Types already warned about
         self.metrics = {
             'commands_received': 0,
             'commands_executed': 0,
@@ -40,6 +64,14 @@ class WebSocketClient:
             'connected_since': None
         }
     
+    def _refresh_cached_config(self):
+        """Cache connection settings so they are not looked up per message."""
+        self._url = self.config.get('websocket', 'url')
+        self._token = self.config.get('api', 'token')
+        self._ping_interval = self.config.get('websocket', 'ping_interval')
+        self._ping_timeout = self._ping_interval * 2
+        self._reconnect_interval = self.config.get('websocket', 'reconnect_interval')
+    
     async def start(self):
         """Start WebSocket client."""
         self.running = True
@@ -48,7 +80,7 @@ class WebSocketClient:
             try:
                 await self._connect_and_listen()
             except websockets.exceptions.InvalidURI:
-                logger.error(f"Invalid WebSocket URL: {self.config.get('websocket', 'url')}")
+                logger.error(f"Invalid WebSocket URL: {self._url}")
                 break
             except Exception as e:
                 logger.error(f"WebSocket error: {e}")
@@ -65,44 +97,46 @@ class WebSocketClient:
     
     async def _connect_and_listen(self):
         """Connect to WebSocket server and listen for commands."""
-        url = self.config.get('websocket', 'url')
+        url = self._url
         
         logger.info(f"Connecting to: {url}")
         
         # Prepare headers
         headers = {}
-        token = self.config.get('api', 'token')
+        token = self._token
         if token:
             headers['Authorization'] = f'Bearer {token}'
         
-        # Connect to server
-        async with websockets.connect(url) as websocket:
+        # Connect to server (the library sends keepalive pings and closes dead connections)
+        async with websockets.connect(
+            url,
+            ping_interval=self._ping_interval,
+            ping_timeout=self._ping_timeout
+        ) as websocket:
             self.websocket = websocket
             logger.info("WebSocket connected")
             self._reset_reconnect_delay()
             self.metrics['connected_since'] = time.time()
             
+            # All sends go through one writer task so they never interleave
+            self._send_queue = asyncio.Queue(maxsize=self.SEND_QUEUE_SIZE)
+            writer_task = asyncio.create_task(self._writer_loop(websocket, self._send_queue))
+            
             # Send initial connection message if there's an active session
-            await self._send_active_sessions()
+            self._send_active_sessions()
             
-            # Create ping task
-            ping_task = asyncio.create_task(self._ping_loop())
+            # Bind per-message lookups to locals
+            recv = websocket.recv
+            handle_message = self._handle_message
             
             try:
                 while self.running:
                     try:
-                        # Receive message with timeout
-                        message = await asyncio.wait_for(
-                            websocket.recv(),
-                            timeout=self.config.get('websocket', 'ping_interval') * 2
-                        )
+                        # Receive message
+                        message = await recv()
                         
                         # Process message
-                        await self._handle_message(message)
-                        
-                    except asyncio.TimeoutError:
-                        # No message received, continue
-                        continue
+                        await handle_message(message)
                         
                     except websockets.exceptions.ConnectionClosed:
                         break  # Server closed connection
@@ -111,7 +145,8 @@ class WebSocketClient:
                         logger.error(f"Error processing message: {e}")
             
             finally:
-                ping_task.cancel()
+                writer_task.cancel()
+                self._send_queue = None
                 self.websocket = None
                 self.metrics['connected_since'] = None
     
@@ -125,18 +160,18 @@ class WebSocketClient:
         # Process incoming message
         
         try:
-            data = json.loads(message)
+            data = orjson.loads(message)
             message_type = data.get('message_type', '')
             
-            if message_type == 'execute_command':
-                await self._handle_execute_command(data)
-            elif message_type == "session_finished":
-                ...
-            else:
-                logger.warning(message)
-                logger.warning(f"Unknown message type: {message_type}")
+            handler = self._message_handlers.get(message_type)
+            if handler is not None:
+                await handler(data)
+            elif message_type not in self._unknown_message_types:
+                # Warn once per type to keep repeated unknown messages out of the logs
+                self._unknown_message_types.add(message_type)
+                logger.warning(f"Unknown message type: {message_type} ({message[:200]})")
                 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logger.error("Invalid JSON received")
         except Exception as e:
             logger.error(f"Message handling error: {e}")
@@ -173,31 +208,77 @@ class WebSocketClient:
         # Record in session monitor
         self.session_monitor.record_command(command)
         
-        # Send response to server
-        response = {
-            'message_type': 'command_executed',
-            'output': result['stdout']
-        }
-        
+        # Send response to server, serializing only the variable fields
+        parts = [_COMMAND_EXECUTED_PREFIX, orjson.dumps(result['stdout'])]
         if 'error' in result:
-            response['output']['error'] = result['error']
+            parts.append(b',"error":')
+            parts.append(orjson.dumps(result['error']))
+        parts.append(b'}')
         
-        await self.websocket.send(json.dumps(response))
-        # Command response sent
+        self._send_raw(b''.join(parts).decode())
+        # Command response queued
     
-    async def _send_active_sessions(self):
+    async def _handle_session_finished(self, data: Dict[str, Any]):
+        """
+        Handle session_finished message from server.
+        
+        Args:
+            data: Parsed message data
+        """
+        ...
+    
+    def _send(self, message: Dict[str, Any]) -> bool:
+        """
+        Serialize a message and queue it for the writer task.
+        
+        Args:
+            message: Message to send
+            
+        Returns:
+            True if the message was queued
+        """
+        return self._send_raw(orjson.dumps(message).decode())
+    
+    def _send_raw(self, text: str) -> bool:
+        """
+        Queue an already serialized message for the writer task.
+        
+        Args:
+            text: JSON text to send
+            
+        Returns:
+            True if the message was queued
+        """
+        if self._send_queue is None:
+            return False
+        
+        try:
+            self._send_queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            logger.error("Outbound message queue full, dropping message")
+            return False
+    
+    async def _writer_loop(self, websocket, queue: asyncio.Queue):
+        """Send queued messages over the connection, one at a time."""
+        send = websocket.send
+        while True:
+            message = await queue.get()
+            try:
+                await send(message)
+            except websockets.exceptions.ConnectionClosed:
+                break  # Receive loop handles the disconnect
+            except Exception as e:
+                logger.error(f"Failed to send message: {e}")
+    
+    def _send_active_sessions(self):
         """Send information about any active Claude sessions."""
         # Check if there are active sessions to report
-        if hasattr(self.session_monitor, 'active_sessions'):
-            for session_id in self.session_monitor.active_sessions:
-                if session_id in self.session_monitor.sent_sessions:
-                    # Session is active and has been sent to API
-                    message = {
-                        'message_type': 'session_active',
-                        'session_id': session_id
-                    }
-                    await self.websocket.send(json.dumps(message))
-                    pass  # Notified server of active session
+        if hasattr(self.session_monitor, 'sent_session_ids'):
+            # Sessions that are active and have been sent to API
+            for session_id in self.session_monitor.sent_session_ids():
+                self._send_raw(_session_message(_SESSION_ACTIVE_PREFIX, 'session_active', session_id))
+                pass  # Notified server of active session
     
     async def send_session_finished(self, server_session_id: str):
         """
@@ -207,29 +288,9 @@ class WebSocketClient:
             server_session_id: The server's session ID to notify as finished
         """
         if self.websocket:
-            message = {
-                'message_type': 'session_finished',
-                'session_id': server_session_id
-            }
-            try:
-                await self.websocket.send(json.dumps(message))
-                logger.info(f"Sent session_finished for server session: {server_session_id}")
-            except Exception as e:
-                logger.error(f"Failed to send session_finished: {e}")
-    
-    async def _ping_loop(self):
-        """Send periodic pings to keep connection alive."""
-        ping_interval = self.config.get('websocket', 'ping_interval')
-        
-        while self.running and self.websocket:
-            try:
-                await asyncio.sleep(ping_interval)
-                if self.websocket:
-                    await self.websocket.ping()
-                    pass  # Ping sent
-            except Exception:
-                pass  # Ping failed
-                break
+            message = _session_message(_SESSION_FINISHED_PREFIX, 'session_finished', server_session_id)
+            if self._send_raw(message):
+                logger.info(f"Queued session_finished for server session: {server_session_id}")
     
     def _update_reconnect_delay(self):
         """Update reconnection delay with exponential backoff."""
@@ -241,7 +302,7 @@ class WebSocketClient:
     
     def _reset_reconnect_delay(self):
         """Reset reconnection delay to initial value."""
-        self.reconnect_delay = self.config.get('websocket', 'reconnect_interval')
+        self.reconnect_delay = self._reconnect_interval
     
     def get_metrics(self) -> Dict[str, Any]:
         """Get WebSocket client metrics."""
@@ -1,16 +1,25 @@
 import os
-import json
+import asyncio
+import itertools
 import logging
+import re
 import time
-from datetime import datetime
-from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 from fastapi import FastAPI, Request, HTTPException, Depends
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 import httpx
+import orjson
 from dotenv import load_dotenv
 import uvicorn
 
+try:
+    import simdjson
+except ImportError:  # Optional accelerator; fall back to orjson
+    simdjson = None
+
 # Load environment variables
 load_dotenv()
 
@@ -29,10 +38,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled upstream client across requests"""
+    app.state.client = httpx.AsyncClient(
+        timeout=300.0,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+    )
+    request_logger.start()
+    yield
+    await request_logger.stop()
+    await app.state.client.aclose()
+
 app = FastAPI(
     title="OpenAI API Proxy",
     description="A proxy server for OpenAI API calls with logging and monitoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -48,37 +71,166 @@ app.add_middleware(
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
 
+# Disk log writer settings
+LOG_QUEUE_SIZE = 10000
+LOG_BATCH_SIZE = 100
+STREAM_LOG_BUFFER_SIZE = 64 * 1024
+
 if not OPENAI_API_KEY:
     logger.error("OPENAI_API_KEY environment variable is not set")
     raise ValueError("OPENAI_API_KEY environment variable is required")
 
+# Reused across chunks so simdjson can keep its parse buffers
+_sse_parser = simdjson.Parser() if simdjson else None
+
+def get_finish_reason(payload: bytes) -> Optional[str]:
+    """Extract choices[0].finish_reason from an SSE data payload"""
+    if _sse_parser is not None:
+        try:
+            return _sse_parser.parse(payload).at_pointer("/choices/0/finish_reason")
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+
+    try:
+        data = orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        return None
+    if isinstance(data, dict) and data.get("choices"):
+        return data["choices"][0].get("finish_reason")
+    return None
+
+# Text of the first <user_query> tag in a message (an unclosed tag runs to the end)
+_USER_QUERY_RE = re.compile(r"<user_query>(.*?)(?:</user_query>|\Z)", re.DOTALL)
+
+def find_latest_user_query(messages: list) -> Optional[str]:
+    """Return the user query from the most recent user message that has one"""
+    for message in reversed(messages):
+        content = message.get("content")
+        if message.get("role") != "user" or not isinstance(content, str):
+            continue
+        match = _USER_QUERY_RE.search(content)
+        if match and match.group(1):
+            return match.group(1)
+    return None
+
+# Upstream response headers passed back to the client; hop-by-hop and encoding
+# headers are dropped since httpx has already decoded the body
+_FORWARDED_RESPONSE_HEADERS = frozenset({
+    "content-type", "cache-control", "x-request-id", "retry-after", "retry-after-ms",
+})
+_FORWARDED_RESPONSE_HEADER_PREFIXES = ("openai-", "x-ratelimit-")
+
+def forwarded_response_headers(headers: httpx.Headers) -> Dict[str, str]:
+    """Select the upstream response headers to return to the client"""
+    return {
+        name: value for name, value in headers.items()
+        if name in _FORWARDED_RESPONSE_HEADERS or name.startswith(_FORWARDED_RESPONSE_HEADER_PREFIXES)
+    }
+
+# Distinguishes log files created within the same nanosecond
+_log_counter = itertools.count()
+
+@lru_cache(maxsize=1)
+def _iso_seconds(sec: int) -> str:
+    """Format whole seconds since the epoch as an ISO-8601 UTC string (cached per second)"""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+
+def log_timestamp() -> str:
+    """Return the current time as an ISO-8601 UTC timestamp"""
+    sec, frac = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_iso_seconds(sec)}.{frac // 1000:06d}"
+
+def stream_log_name() -> str:
+    """Return a unique, sortable file name for a stream log"""
+    return f"{time.time_ns()}-{next(_log_counter)}"
+
 class RequestLogger:
     """Class to handle request/response logging"""
-    
+
+    def __init__(self):
+        # Log entries are written to disk by a background task, off the request path
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.dropped = 0
+        self._writer_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start the background log writer"""
+        self._writer_task = asyncio.create_task(self._writer_loop())
+
+    async def stop(self):
+        """Flush pending log entries and stop the background log writer"""
+        await self.queue.join()
+        if self._writer_task:
+            self._writer_task.cancel()
+            self._writer_task = None
+
+    def _enqueue(self, path: str, log_data: dict):
+        """Queue a log entry for writing, dropping it if the writer has fallen behind"""
+        try:
+            self.queue.put_nowait((path, log_data))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Log queue full, dropped {self.dropped} log entries so far")
+
+    async def _writer_loop(self):
+        """Write queued log entries to disk in batches"""
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < LOG_BATCH_SIZE and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write logs: {e}")
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
     @staticmethod
-    def log_request(endpoint: str, method: str, headers: dict, body: Any, client_ip: str):
+    def _write_batch(batch: List[Tuple[str, dict]]):
+        """Append a batch of log entries as JSON lines (runs in a worker thread)"""
+        lines_by_path: Dict[str, List[bytes]] = {}
+        for path, log_data in batch:
+            lines_by_path.setdefault(path, []).append(
+                orjson.dumps(log_data, option=orjson.OPT_APPEND_NEWLINE)
+            )
+
+        for path, lines in lines_by_path.items():
+            with open(path, "ab") as f:
+                f.write(b"".join(lines))
+    
+    def log_request(self, endpoint: str, method: str, headers: dict, body: Any, client_ip: str):
         """Log incoming request details"""
+        timestamp = log_timestamp()
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
             "type": "request",
             "endpoint": endpoint,
             "method": method,
             "client_ip": client_ip,
-            "headers": dict(headers),
+            # Only a summary of the headers; never write credentials to disk
+            "headers": {
+                "content-type": headers.get("content-type"),
+                "user-agent": headers.get("user-agent"),
+                "authorization_present": "authorization" in headers
+            },
             "body": body
         }
         # logger.info(f"REQUEST: {json.dumps(log_data, indent=2)[:100]}")
 
-        with open(f"data/requests/{datetime.utcnow().isoformat()}.json", "w") as f:
-            f.write(json.dumps(log_data, indent=2))
+        # One JSONL file per day (the timestamp starts with the ISO date)
+        self._enqueue(f"data/requests/{timestamp[:10]}.jsonl", log_data)
 
         return log_data
     
-    @staticmethod
-    def log_response(request_log: dict, status_code: int, response_body: Any, response_time: float):
+    def log_response(self, request_log: dict, status_code: int, response_body: Any, response_time: float):
         """Log response details"""
+        timestamp = log_timestamp()
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
             "type": "response",
             "request_id": request_log.get("timestamp"),
             "status_code": status_code,
@@ -87,26 +239,21 @@ class RequestLogger:
         }
         # logger.info(f"RESPONSE: {json.dumps(log_data, indent=2)[:100]}")
 
-        with open(f"data/responses/{datetime.utcnow().isoformat()}.json", "w") as f:
-            f.write(json.dumps(log_data, indent=2))
+        self._enqueue(f"data/responses/{timestamp[:10]}.jsonl", log_data)
 
         return log_data
     
     @staticmethod
-    def log_stream_response(response_body: Any, timestamp: str):
+    def log_stream_response(response_body: bytes, stream_file: BinaryIO):
         """Log streaming response details"""
 
-        try:
-            data = json.loads(response_body.strip("data: ").strip())
-            if "choices" in data and data["choices"]:
-                if data["choices"][0]["finish_reason"]:
-                    print(f"\n\nFINISH REASON: {data['choices'][0]['finish_reason']}\n\n")
-        except json.JSONDecodeError:
-            pass
+        finish_reason = get_finish_reason(response_body.removeprefix(b"data: ").strip())
+        if finish_reason:
+            print(f"\n\nFINISH REASON: {finish_reason}\n\n")
 
         # Write raw SSE data without JSON wrapping to preserve streaming format
-        with open(f"data/responses/{timestamp}.stream", "a") as f:
-            f.write(response_body + "\n\n")
+        stream_file.write(response_body)
+        stream_file.write(b"\n\n")
         return response_body
 
 request_logger = RequestLogger()
@@ -123,42 +270,40 @@ async def proxy_request(request: Request, endpoint_path: str):
     start_time = time.time()
     client_ip = await get_client_ip(request)
     
-    # Read request body
+    # Read request body (GET requests such as /models have none to rewrite)
     body = await request.body()
     request_data = None
-    if body:
+    if body and request.method != "GET":
         try:
-            request_data = json.loads(body.decode())
-        except json.JSONDecodeError:
+            request_data = orjson.loads(body)
+        except orjson.JSONDecodeError:
             request_data = body.decode()
 
+    # Only JSON objects are rewritten; anything else is forwarded verbatim
+    if isinstance(request_data, dict):
+        modified = False
+
         if "max_tokens" in request_data:
             request_data["max_completion_tokens"] = request_data["max_tokens"]
             del request_data["max_tokens"]
+            modified = True
 
-        if "model" in request_data:
+        if "model" in request_data and request_data["model"] != "gpt-4.1-mini":
             request_data["model"] = "gpt-4.1-mini"
+            modified = True
 
+        # Re-encode only when the request data was changed
+        if modified:
+            body = orjson.dumps(request_data)
 
-        ## Detect user query
-        if "messages" in request_data:
-            def find_user_query(message: str):
-                if "<user_query>" in message:
-                    return message.split("<user_query>")[1].split("</user_query>")[0]
-                return None
-            
-            latest_user_message = [
-                find_user_query(i["content"]) for i in request_data["messages"] 
-                if i["role"] == "user" and find_user_query(i["content"])
-            ]
+
+        ## Detect user query (skip the scan when no message can contain one)
+        if "messages" in request_data and b"<user_query>" in body:
+            latest_user_message = find_latest_user_query(request_data["messages"])
 
             if latest_user_message:
-                latest_user_message_str = latest_user_message[-1].strip()
+                latest_user_message_str = latest_user_message.strip()
                 print(f"\n\nLATEST USER MESSAGE: {latest_user_message_str}\n\n")
-
-    
-    # Encode the changed request data
-    body = json.dumps(request_data).encode()
     
     # Log the incoming request
     request_log = request_logger.log_request(
@@ -180,63 +325,96 @@ async def proxy_request(request: Request, endpoint_path: str):
     url = f"{OPENAI_API_BASE}/{endpoint_path}"
     
     try:
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                headers=headers,
-                content=body,
-                params=request.query_params
-            )
-            
-            response_time = time.time() - start_time
-            
-            # Handle streaming responses
-            if response.headers.get("content-type", "").startswith("text/event-stream"):
-                async def stream_response():
-                    timestamp = datetime.utcnow().isoformat()
+        client = request.app.state.client
+        response = await client.request(
+            method=request.method,
+            url=url,
+            headers=headers,
+            content=body,
+            params=request.query_params
+        )
+        
+        response_time = time.time() - start_time
+        
+        response_headers = forwarded_response_headers(response.headers)
+        
+        # Handle streaming responses
+        if response.headers.get("content-type", "").startswith("text/event-stream"):
+            async def stream_response():
+                file_name = stream_log_name()
+                # Keep one buffered stream log open for the whole response
+                stream_file = open(f"data/responses/{file_name}.stream", "ab", buffering=STREAM_LOG_BUFFER_SIZE)
+                try:
+                    # SSE events may be split across chunks, so buffer until a full event arrives
+                    buf = bytearray()
                     async for chunk in response.aiter_bytes():
-                    
-                        for line in chunk.decode("utf-8").split("\n\n"):
+                        buf.extend(chunk)
+                        while (idx := buf.find(b"\n\n")) != -1:
+                            line = bytes(buf[:idx])
+                            del buf[:idx + 2]
                             request_logger.log_stream_response(
                                 response_body=line,
-                                timestamp=timestamp
+                                stream_file=stream_file
                             )
-                            # Yield the raw chunk to maintain SSE format
-                            yield line.encode("utf-8") + b"\n\n"
-                
-                # Log streaming response start
-                request_logger.log_response(
-                    request_log=request_log,
-                    status_code=response.status_code,
-                    response_body="[STREAMING_RESPONSE]",
-                    response_time=response_time
-                )
-                
-                return StreamingResponse(
-                    stream_response(),
-                    status_code=response.status_code,
-                    headers=dict(response.headers),
-                    media_type=response.headers.get("content-type")
-                )
+                            # Yield the raw event to maintain SSE format
+                            yield line + b"\n\n"
+
+                    # Flush a trailing event that was not terminated by a blank line
+                    if buf:
+                        line = bytes(buf)
+                        request_logger.log_stream_response(
+                            response_body=line,
+                            stream_file=stream_file
+                        )
+                        yield line + b"\n\n"
+                finally:
+                    stream_file.close()
             
-            # Handle regular JSON responses
-            response_data = response.json() if response.content else None
-            
-            # Log the response
+            # Log streaming response start
             request_logger.log_response(
                 request_log=request_log,
                 status_code=response.status_code,
-                response_body=response_data,
+                response_body="[STREAMING_RESPONSE]",
                 response_time=response_time
             )
             
-            return JSONResponse(
-                content=response_data,
+            return StreamingResponse(
+                stream_response(),
                 status_code=response.status_code,
-                headers=dict(response.headers)
+                headers=response_headers,
+                media_type=response.headers.get("content-type")
             )
-            
+        
+        # Handle regular responses: pass the upstream bytes through untouched
+        content = response.content
+        if not content:
+            response_data = None
+        else:
+            # Parsed only for the log entry, which must stay on a single line;
+            # malformed bodies are logged as text
+            response_data = None
+            if response.headers.get("content-type", "").startswith("application/json"):
+                try:
+                    response_data = orjson.loads(content)
+                except orjson.JSONDecodeError:
+                    pass
+            if response_data is None:
+                response_data = content.decode(errors="replace")
+        
+        # Log the response
+        request_logger.log_response(
+            request_log=request_log,
+            status_code=response.status_code,
+            response_body=response_data,
+            response_time=response_time
+        )
+        
+        return Response(
+            content=content,
+            status_code=response.status_code,
+            headers=response_headers
+        )
+        
     except httpx.RequestError as e:
         error_time = time.time() - start_time
         error_msg = f"Request failed: {str(e)}"
@@ -251,33 +429,11 @@ async def proxy_request(request: Request, endpoint_path: str):
         
         raise HTTPException(status_code=500, detail=error_msg)
 
-# OpenAI API endpoints
-@app.api_route("/chat/completions", methods=["POST"])
-async def chat_completions(request: Request):
-    """Proxy for OpenAI chat completions"""
-    return await proxy_request(request, "chat/completions")
-
-
-@app.api_route("/embeddings", methods=["POST"])
-async def embeddings(request: Request):
-    """Proxy for OpenAI embeddings"""
-    return await proxy_request(request, "embeddings")
-
-@app.api_route("/models", methods=["GET"])
-async def models(request: Request):
-    """Proxy for OpenAI models list"""
-    return await proxy_request(request, "models")
-
-@app.api_route("/models/{model_id}", methods=["GET"])
-async def model_details(request: Request, model_id: str):
-    """Proxy for OpenAI model details"""
-    return await proxy_request(request, f"models/{model_id}")
-
 # Health check and status endpoints
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": log_timestamp()}
 
 @app.get("/")
 async def root():
@@ -295,6 +451,30 @@ async def root():
         "made_by": "Made by AI"
     }
 
+# OpenAI API endpoints and the methods they accept ("models/{model_id}" uses "models")
+PROXIED_ENDPOINTS = {
+    "chat/completions": {"POST"},
+    "embeddings": {"POST"},
+    "models": {"GET"},
+}
+
+# Registered after /health and / so those keep their own handlers
+@app.api_route("/{endpoint_path:path}", methods=["GET", "POST"])
+async def openai_endpoint(request: Request, endpoint_path: str):
+    """Proxy for the supported OpenAI API endpoints"""
+    model_id = endpoint_path[len("models/"):] if endpoint_path.startswith("models/") else None
+    if model_id and "/" not in model_id:
+        allowed_methods = PROXIED_ENDPOINTS["models"]
+    else:
+        allowed_methods = PROXIED_ENDPOINTS.get(endpoint_path)
+
+    if allowed_methods is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if request.method not in allowed_methods:
+        raise HTTPException(status_code=405, detail="Method Not Allowed")
+
+    return await proxy_request(request, endpoint_path)
+
 if __name__ == "__main__":
     host = os.getenv("HOST", "0.0.0.0")
     port = int(os.getenv("PORT", 8001))